@@ -10,14 +10,11 @@ import requests
 from functools import lru_cache
 from dotenv import load_dotenv
 
-from collibra_exporter.utils.auth import get_auth_header
+from collibra_exporter.api.client import client, parse_json
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
-# Create a session for reuse
-session = requests.Session()
-
 @lru_cache(maxsize=1)
 def get_available_asset_types():
     """
@@ -33,22 +30,25 @@ def get_available_asset_types():
     url = f"https://{base_url}/rest/2.0/assetTypes"
 
     try:
-        session.headers.update(get_auth_header())
-        response = session.get(url)
-        response.raise_for_status()
-        original_results = response.json()["results"]
+        response = client.make_request(url, method='get')
+        original_results = parse_json(response.content)["results"]
         modified_results = [{"id": asset["id"], "name": asset["name"]} for asset in original_results]
         
-        logger.info(f"Successfully retrieved {len(modified_results)} asset types")
+        logger.info("Successfully retrieved %s asset types", len(modified_results))
         return {"results": modified_results}
     except requests.RequestException as e:
-        logger.error(f"Failed to retrieve asset types: {e}")
+        logger.error("Failed to retrieve asset types: %s", e)
         raise
 
+@lru_cache(maxsize=1024)
 def get_asset_type_name(asset_type_id):
     """
     Get the name of an asset type by its ID.
     
+    Names do not change during a run and each asset type's name is needed
+    both by the exporter and when fetching its assets, so lookups are
+    cached. Failed lookups are not cached and are retried on the next call.
+    
     Args:
         asset_type_id (str): The ID of the asset type
         
@@ -62,11 +62,9 @@ def get_asset_type_name(asset_type_id):
     url = f"https://{base_url}/rest/2.0/assetTypes/{asset_type_id}"
 
     try:
-        session.headers.update(get_auth_header())
-        response = session.get(url)
-        response.raise_for_status()
-        json_response = response.json()
+        response = client.make_request(url, method='get')
+        json_response = parse_json(response.content)
         return json_response["name"]
     except requests.RequestException as e:
-        logger.error(f"Asset type not found in Collibra: {e}")
+        logger.error("Asset type not found in Collibra: %s", e)
         raise
@@ -5,12 +5,17 @@ This module provides a client for interacting with the Collibra API.
 """
 
 import os
+import json
 import time
 import logging
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
-from collibra_exporter.utils.auth import get_auth_header
+from collibra_exporter.api.graphql import NESTED_FIELDS, get_query, get_nested_query
+from collibra_exporter.utils.auth import CollibraAuth, refresh_oauth_token
 from collibra_exporter.utils.common import PerformanceLogger
 
 # Configure logger
@@ -22,6 +27,81 @@ load_dotenv()
 # Get base URL from environment
 base_url = os.getenv('COLLIBRA_INSTANCE_URL')
 
+# Number of asset types fetched in parallel
+MAX_WORKERS = int(os.getenv('MAX_WORKERS', '5'))
+# Requests each fetch worker can have in flight: the next page on its
+# prefetch thread plus one nested_fetcher thread per nested field
+REQUESTS_PER_WORKER = len(NESTED_FIELDS) + 1
+
+def _replace_surrogates(value):
+    """
+    Replace unpaired UTF-16 surrogates in the strings of a parsed JSON value.
+    
+    Args:
+        value: The parsed JSON value
+        
+    Returns:
+        The value with every unpaired surrogate replaced with '?'
+    """
+    if isinstance(value, str):
+        return value if value.isascii() else value.encode('utf-8', 'replace').decode('utf-8')
+    if isinstance(value, dict):
+        return {_replace_surrogates(key): _replace_surrogates(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_replace_surrogates(item) for item in value]
+    return value
+
+def parse_json(content):
+    """
+    Parse a JSON response body.
+    
+    orjson rejects strings with an unpaired UTF-16 surrogate escape such as
+    \\ud800, which the standard library json module accepts. Such a body is
+    parsed with json instead, and the unpaired surrogates are replaced with
+    '?', since they cannot be encoded for the database.
+    
+    Args:
+        content (bytes): The response body
+        
+    Returns:
+        The parsed JSON value
+        
+    Raises:
+        json.JSONDecodeError: If the body is not valid JSON
+    """
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        return _replace_surrogates(json.loads(content))
+
+def create_session():
+    """
+    Create a requests session for the Collibra API.
+    
+    The session keeps a connection pool large enough for every request the
+    MAX_WORKERS fetch workers can have in flight, so none of them has to
+    open and then discard an extra connection. It retries transient
+    failures (rate limiting and 5xx responses) with exponential backoff.
+    GraphQL queries are read-only, so POST is retried as well. Every
+    request is authenticated with the cached OAuth token.
+    
+    Returns:
+        requests.Session: The configured session
+    """
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset({'GET', 'POST'}),
+        raise_on_status=False
+    )
+    pool_size = MAX_WORKERS * REQUESTS_PER_WORKER
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max(32, pool_size), max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.auth = CollibraAuth()
+    return session
+
 class CollibraClient:
     """
     Client for interacting with the Collibra API.
@@ -32,7 +112,7 @@ class CollibraClient:
     
     def __init__(self):
         """Initialize the Collibra API client."""
-        self.session = requests.Session()
+        self.session = create_session()
         self.graphql_url = f"https://{base_url}/graphql/knowledgeGraph/v1"
         
     def make_request(self, url, method='post', **kwargs):
@@ -51,18 +131,19 @@ class CollibraClient:
             requests.RequestException: If the request fails
         """
         try:
-            # Always get fresh headers before making a request
-            headers = get_auth_header()
-            if 'headers' in kwargs:
-                kwargs['headers'].update(headers)
-            else:
-                kwargs['headers'] = headers
-
+            # The session's auth handler adds the current token to each request
             response = getattr(self.session, method)(url=url, **kwargs)
+            if response.status_code == 401:
+                # The token was rejected before its expected expiry, refresh it
+                # once; the retried request is sent with the new token
+                logger.warning("Request unauthorized, refreshing OAuth token and retrying")
+                rejected = response.request.headers.get('Authorization', '')
+                refresh_oauth_token(rejected.partition(' ')[2] or None)
+                response = getattr(self.session, method)(url=url, **kwargs)
             response.raise_for_status()
             return response
         except requests.RequestException as error:
-            logger.error(f"Request failed: {str(error)}")
+            logger.error("Request failed: %s", error)
             raise
             
     def fetch_data(self, asset_type_id, paginate, limit, nested_offset=0, nested_limit=50):
@@ -79,31 +160,30 @@ class CollibraClient:
         Returns:
             dict: The response data or None if the request fails
         """
-        from collibra_exporter.api.graphql import get_query
-        
         try:
             query = get_query(asset_type_id, f'"{paginate}"' if paginate else 'null', nested_offset, nested_limit)
             variables = {'limit': limit}
-            logger.debug(f"Sending GraphQL request for asset_type_id: {asset_type_id}, paginate: {paginate}, nested_offset: {nested_offset}")
+            logger.debug("Sending GraphQL request for asset_type_id: %s, paginate: %s, nested_offset: %s", asset_type_id, paginate, nested_offset)
 
             with PerformanceLogger("graphql_request"):
                 response = self.make_request(
                     url=self.graphql_url,
-                    json={
+                    data=orjson.dumps({
                         'query': query,
                         'variables': variables
-                    }
+                    }),
+                    headers={'Content-Type': 'application/json'}
                 )
             
-            data = response.json()
+            data = parse_json(response.content)
             
             if 'errors' in data:
-                logger.error(f"GraphQL errors received: {data['errors']}")
+                logger.error("GraphQL errors received: %s", data['errors'])
                 return None
                 
             return data
         except Exception as error:
-            logger.error(f'Error fetching data: {error}')
+            logger.error('Error fetching data: %s', error)
             return None
             
     def fetch_nested_data(self, asset_type_id, asset_id, field_name, nested_offset=0, nested_limit=20000):
@@ -120,51 +200,58 @@ class CollibraClient:
         Returns:
             list: The nested data items or None if the request fails
         """
-        from collibra_exporter.api.graphql import get_nested_query
-        
         try:
             query = get_nested_query(asset_type_id, asset_id, field_name, nested_offset, nested_limit)
             
             with PerformanceLogger(f"nested_graphql_request_{field_name}"):
                 response = self.make_request(
                     url=self.graphql_url,
-                    json={'query': query}
+                    data=orjson.dumps({'query': query}),
+                    headers={'Content-Type': 'application/json'}
                 )
             
-            data = response.json()
+            data = parse_json(response.content)
             
             if 'errors' in data:
-                logger.error(f"GraphQL errors in nested query: {data['errors']}")
+                logger.error("GraphQL errors in nested query: %s", data['errors'])
                 return None
                 
             if not data['data']['assets']:
-                logger.error(f"No asset found in nested query response")
+                logger.error("No asset found in nested query response")
                 return None
                 
             return data['data']['assets'][0][field_name]
         except Exception as e:
-            logger.exception(f"Failed to fetch nested data for {field_name}: {str(e)}")
+            logger.exception("Failed to fetch nested data for %s: %s", field_name, e)
             return None
             
-    def fetch_nested_data_with_pagination(self, asset_type_id, asset_id, field_name, batch_size=20000):
+    def fetch_nested_data_with_pagination(self, asset_type_id, asset_id, field_name, already_fetched=None,
+                                          batch_size=20000):
         """
         Fetch all nested data for a field using pagination.
         
+        Items that were already retrieved with the asset are kept and
+        pagination resumes right after them, so they are not requested again.
+        The list of those items is extended in place rather than copied.
+        
         Args:
             asset_type_id (str): ID of the asset type
             asset_id (str): ID of the specific asset
             field_name (str): Name of the nested field to fetch
+            already_fetched (list): Items of the field already retrieved,
+                extended in place with the fetched items
             batch_size (int): Number of items to fetch per request
         
         Returns:
-            list: All nested items for the field or None if the request fails
+            list: All nested items for the field. If a request fails, the
+                items retrieved up to that point are returned.
         """
-        all_items = []
-        offset = 0
+        all_items = already_fetched if already_fetched is not None else []
+        offset = len(all_items)
         batch_number = 1
 
         while True:
-            logger.info(f"Fetching batch {batch_number} for {field_name} (offset: {offset})")
+            logger.info("Fetching batch %s for %s (offset: %s)", batch_number, field_name, offset)
             
             current_items = self.fetch_nested_data(
                 asset_type_id, 
@@ -174,13 +261,18 @@ class CollibraClient:
                 batch_size
             )
             
+            if current_items is None:
+                logger.warning("Failed to fetch batch %s for %s, keeping %s items retrieved so far",
+                               batch_number, field_name, len(all_items))
+                break
+                
             if not current_items:
                 break
                 
             current_batch_size = len(current_items)
             
             all_items.extend(current_items)
-            logger.info(f"Retrieved {current_batch_size} items in batch {batch_number}")
+            logger.info("Retrieved %s items in batch %s", current_batch_size, batch_number)
             
             # If we got fewer items than the batch size, we've reached the end
             if current_batch_size < batch_size:
@@ -189,7 +281,7 @@ class CollibraClient:
             offset += batch_size
             batch_number += 1
 
-        logger.info(f"Completed fetching {field_name}. Total items: {len(all_items)}")
+        logger.info("Completed fetching %s. Total items: %s", field_name, len(all_items))
         return all_items
 
 # Create a singleton instance
@@ -4,6 +4,23 @@ GraphQL query module for Collibra API
 This module provides functions to generate GraphQL queries for Collibra API.
 """
 
+from functools import lru_cache
+
+# Nested fields of an asset that are paginated separately when truncated
+NESTED_FIELDS = (
+    'stringAttributes',
+    'multiValueAttributes',
+    'numericAttributes',
+    'dateAttributes',
+    'booleanAttributes',
+    'outgoingRelations',
+    'incomingRelations',
+    'responsibilities',
+)
+
+# Stands in for the pagination token in cached query templates
+_PAGINATE_PLACEHOLDER = '__PAGINATE__'
+
 def get_query(asset_type_id, paginate, nested_offset=0, nested_limit=50):
     """
     Generate the main GraphQL query for fetching assets.
@@ -17,10 +34,30 @@ def get_query(asset_type_id, paginate, nested_offset=0, nested_limit=50):
     Returns:
         str: The GraphQL query string
     """
+    template = _get_query_template(asset_type_id, nested_offset, nested_limit)
+    return template.replace(_PAGINATE_PLACEHOLDER, paginate)
+
+@lru_cache(maxsize=128)
+def _get_query_template(asset_type_id, nested_offset, nested_limit):
+    """
+    Build the main GraphQL query with a placeholder for the pagination token.
+    
+    Only the pagination token changes from page to page, so the query is
+    built once per asset type and reused for every page.
+    
+    Args:
+        asset_type_id (str): The asset type ID to query
+        nested_offset (int): Offset for nested fields
+        nested_limit (int): Limit for nested fields
+        
+    Returns:
+        str: The GraphQL query string with _PAGINATE_PLACEHOLDER in place
+            of the pagination token
+    """
     return f"""
     query Assets($limit: Int!) {{
         assets(
-            where: {{ type: {{ id: {{ eq: "{asset_type_id}" }} }} id:{{gt:{paginate}}} }}
+            where: {{ type: {{ id: {{ eq: "{asset_type_id}" }} }} id:{{gt:{_PAGINATE_PLACEHOLDER}}} }}
             limit: $limit
         ) {{
             id
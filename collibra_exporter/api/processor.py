@@ -4,129 +4,311 @@ Asset data processor module
 This module provides functions for processing and transforming Collibra asset data.
 """
 
+import time
 import logging
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
-from collibra_exporter.utils.common import is_empty, PerformanceLogger
+from collibra_exporter.utils.common import PerformanceLogger
 from collibra_exporter.api.client import client
+from collibra_exporter.api.graphql import NESTED_FIELDS
 from collibra_exporter.api.asset_types import get_asset_type_name
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
-def process_data(asset_type_id, limit=94, nested_limit=50):
+# Assets ahead of the consumer whose truncated nested fields are being fetched
+NESTED_PREFETCH_ASSETS = 16
+# Smallest batch size used when backing off after failed requests
+MIN_BATCH_LIMIT = 25
+# Responses faster than this (in seconds) allow the batch size to grow
+FAST_RESPONSE_SECONDS = 1.0
+
+def _fetch_page(asset_type_id, paginate, limit, nested_limit):
     """
-    Process asset data with improved nested field handling.
+    Fetch one page of assets and measure how long the request took.
     
     Args:
-        asset_type_id (str): The asset type ID to process
-        limit (int): Maximum number of assets to return per batch
+        asset_type_id (str): The asset type ID to query
+        paginate (str): ID of the last asset of the previous page, or None
+        limit (int): Maximum number of assets to return
         nested_limit (int): Limit for nested fields
         
     Returns:
-        list: List of processed assets
+        tuple: The response data (or None) and the request time in seconds
+    """
+    request_start = time.perf_counter()
+    object_response = client.fetch_data(asset_type_id, paginate, limit, 0, nested_limit)
+    return object_response, time.perf_counter() - request_start
+
+def _submit_nested_fetches(nested_fetcher, asset_type_id, asset, nested_limit, batch_count, asset_idx):
+    """
+    Queue the complete fetch of every truncated nested field of an asset.
+    
+    Fields that hit the initial limit are fetched in full with pagination,
+    which resumes after the items the asset already has.
+    
+    Args:
+        nested_fetcher (ThreadPoolExecutor): Pool running the fetches
+        asset_type_id (str): The asset type ID
+        asset (dict): The asset whose fields are checked
+        nested_limit (int): Limit the nested fields were fetched with
+        batch_count (int): Number of the current batch, for logging
+        asset_idx (int): Position of the asset in its batch, for logging
+        
+    Returns:
+        dict: Futures of the complete field lists, by field name
+    """
+    asset_pending = {}
+    for field in NESTED_FIELDS:
+        if field in asset and len(asset[field]) == nested_limit:
+            logger.info("[Batch %s][Asset %s][%s] Fetching complete data with pagination...",
+                        batch_count, asset_idx, field)
+            asset_pending[field] = nested_fetcher.submit(
+                client.fetch_nested_data_with_pagination,
+                asset_type_id, asset['id'], field, asset[field]
+            )
+    return asset_pending
+
+def iter_assets(asset_type_id, limit=100, nested_limit=50, max_limit=500):
+    """
+    Fetch asset data page by page with improved nested field handling.
+    
+    Assets are yielded as soon as their nested fields are complete, so
+    callers can transform them without holding every raw asset in memory.
+    The next page is requested in the background while the assets of the
+    current page are completed and consumed, and the truncated nested
+    fields of the page's assets are fetched concurrently.
+    
+    The batch size adapts to the server: it doubles (up to max_limit) after
+    fast, full pages and halves (down to MIN_BATCH_LIMIT) when a request
+    fails, in which case the batch is retried and the size stops growing.
+    
+    Args:
+        asset_type_id (str): The asset type ID to process
+        limit (int): Initial maximum number of assets to return per batch
+        nested_limit (int): Limit for nested fields
+        max_limit (int): Upper bound for the batch size
+        
+    Yields:
+        dict: Processed assets, one at a time
     """
     asset_type_name = get_asset_type_name(asset_type_id)
     logger.info("="*60)
-    logger.info(f"Starting data processing for asset type: {asset_type_name} (ID: {asset_type_id})")
-    logger.info(f"Configuration - Batch Size: {limit}, Nested Limit: {nested_limit}")
+    logger.info("Starting data processing for asset type: %s (ID: %s)", asset_type_name, asset_type_id)
+    logger.info("Configuration - Batch Size: %s, Nested Limit: %s", limit, nested_limit)
     logger.info("="*60)
     
-    all_assets = []
+    total_assets = 0
+    current_limit = limit
     paginate = None
     batch_count = 0
+    next_page = None
 
-    with PerformanceLogger(f"process_data_{asset_type_name}"):
-        while True:
-            batch_count += 1
-            with PerformanceLogger(f"batch_{batch_count}"):
-                logger.info(f"\n[Batch {batch_count}] Starting new batch for {asset_type_name}")
-                logger.debug(f"[Batch {batch_count}] Pagination token: {paginate}")
-                
-                # Get initial batch of assets
-                object_response = client.fetch_data(asset_type_id, paginate, limit, 0, nested_limit)
-                if not object_response or 'data' not in object_response or 'assets' not in object_response['data']:
-                    logger.error(f"[Batch {batch_count}] Failed to fetch initial data")
-                    break
-
-                current_assets = object_response['data']['assets']
-                if not current_assets:
-                    logger.info(f"[Batch {batch_count}] No more assets to fetch")
-                    break
-
-                logger.info(f"[Batch {batch_count}] Processing {len(current_assets)} assets")
-
-                # Process each asset
-                processed_assets = []
-                for asset_idx, asset in enumerate(current_assets, 1):
-                    asset_id = asset['id']
-                    asset_name = asset.get('displayName', 'Unknown Name')
-                    logger.info(f"\n[Batch {batch_count}][Asset {asset_idx}/{len(current_assets)}] Processing: {asset_name}")
-                    
-                    # Initialize complete asset with base data
-                    complete_asset = asset.copy()
+    with PerformanceLogger(f"process_data_{asset_type_name}"), \
+            ThreadPoolExecutor(max_workers=1) as prefetcher, \
+            ThreadPoolExecutor(max_workers=len(NESTED_FIELDS)) as nested_fetcher:
+        try:
+            while True:
+                batch_count += 1
+                with PerformanceLogger(f"batch_{batch_count}"):
+                    logger.info("\n[Batch %s] Starting new batch for %s", batch_count, asset_type_name)
+                    logger.debug("[Batch %s] Pagination token: %s", batch_count, paginate)
                     
-                    # Define nested fields to process
-                    nested_fields = [
-                        'stringAttributes', 
-                        'multiValueAttributes', 
-                        'numericAttributes', 
-                        'dateAttributes', 
-                        'booleanAttributes', 
-                        'outgoingRelations', 
-                        'incomingRelations', 
-                        'responsibilities'
-                    ]
-
-                    # Process each nested field
-                    for field in nested_fields:
-                        if field not in asset:
+                    # Get initial batch of assets, unless it was already requested
+                    if next_page is None:
+                        next_page = prefetcher.submit(_fetch_page, asset_type_id, paginate, current_limit, nested_limit)
+                    object_response, request_time = next_page.result()
+                    next_page = None
+                    if not object_response or 'data' not in object_response or 'assets' not in object_response['data']:
+                        if current_limit > MIN_BATCH_LIMIT:
+                            # Back off and do not grow past this size again
+                            current_limit = max(MIN_BATCH_LIMIT, current_limit // 2)
+                            max_limit = current_limit
+                            logger.warning("[Batch %s] Failed to fetch initial data, retrying with batch size %s",
+                                           batch_count, current_limit)
                             continue
-                            
-                        initial_data = asset[field]
+                        logger.error("[Batch %s] Failed to fetch initial data", batch_count)
+                        break
+
+                    current_assets = object_response['data']['assets']
+                    if not current_assets:
+                        logger.info("[Batch %s] No more assets to fetch", batch_count)
+                        break
+
+                    logger.info("[Batch %s] Processing %s assets", batch_count, len(current_assets))
+
+                    # A short page is the last one; otherwise request the next page
+                    # now, so it downloads while this page is being processed
+                    last_page = len(current_assets) < current_limit
+                    if not last_page:
+                        paginate = current_assets[-1]['id']
                         
-                        # If we hit the initial limit, fetch all data using pagination
-                        if len(initial_data) == nested_limit:
-                            logger.info(f"[Batch {batch_count}][Asset {asset_idx}][{field}] "
-                                      f"Fetching complete data with pagination...")
-                                      
-                            complete_data = client.fetch_nested_data_with_pagination(
-                                asset_type_id,
-                                asset_id,
-                                field
-                            )
-                            
-                            if complete_data:
-                                complete_asset[field] = complete_data
-                                logger.info(f"[Batch {batch_count}][Asset {asset_idx}][{field}] "
-                                          f"Retrieved {len(complete_data)} total items")
-                            else:
-                                logger.warning(f"[Batch {batch_count}][Asset {asset_idx}][{field}] "
-                                             f"Failed to fetch complete data, using initial data")
-                                complete_asset[field] = initial_data
-                        else:
-                            complete_asset[field] = initial_data
-
-                    processed_assets.append(complete_asset)
-                    logger.info(f"[Batch {batch_count}][Asset {asset_idx}] Completed processing")
-
-                all_assets.extend(processed_assets)
-                
-                if len(current_assets) < limit:
-                    logger.info(f"[Batch {batch_count}] Retrieved fewer assets than limit, ending pagination")
-                    break
+                        # Request bigger pages while the server answers quickly
+                        if request_time < FAST_RESPONSE_SECONDS and current_limit < max_limit:
+                            current_limit = min(max_limit, current_limit * 2)
+                            logger.info("[Batch %s] Increasing batch size to %s", batch_count, current_limit)
+                        next_page = prefetcher.submit(_fetch_page, asset_type_id, paginate, current_limit, nested_limit)
+
+                    # Truncated nested fields are fetched on the bounded
+                    # nested_fetcher pool for a window of assets ahead of the
+                    # consumer, so later assets' fields download while earlier
+                    # assets are consumed, without holding the complete lists
+                    # of the whole page at once
+                    pending_fields = deque(
+                        _submit_nested_fetches(nested_fetcher, asset_type_id, asset, nested_limit,
+                                               batch_count, asset_idx)
+                        for asset_idx, asset in enumerate(current_assets[:NESTED_PREFETCH_ASSETS], 1)
+                    )
+
+                    # Process each asset
+                    debug_enabled = logger.isEnabledFor(logging.DEBUG)
+                    for asset_idx, asset in enumerate(current_assets, 1):
+                        asset_pending = pending_fields.popleft()
+                        ahead_idx = asset_idx + NESTED_PREFETCH_ASSETS
+                        if ahead_idx <= len(current_assets):
+                            pending_fields.append(_submit_nested_fetches(
+                                nested_fetcher, asset_type_id, current_assets[ahead_idx - 1], nested_limit,
+                                batch_count, ahead_idx
+                            ))
+                        if debug_enabled:
+                            logger.debug("[Batch %s][Asset %s/%s] Processing: %s", batch_count, asset_idx,
+                                         len(current_assets), asset.get('displayName', 'Unknown Name'))
+                        
+                        # The complete lists replace the truncated ones in the asset
+                        # itself; the page is not used again, so the asset is not copied
+                        for field, future in asset_pending.items():
+                            complete_data = future.result()
+                            asset[field] = complete_data
+                            logger.info("[Batch %s][Asset %s][%s] Retrieved %s total items",
+                                        batch_count, asset_idx, field, len(complete_data))
+
+                        if debug_enabled:
+                            logger.debug("[Batch %s][Asset %s] Completed processing", batch_count, asset_idx)
+                        total_assets += 1
+                        yield asset
                     
-                paginate = current_assets[-1]['id']
-                logger.info(f"\n[Batch {batch_count}] Completed batch")
-                logger.info(f"Total assets processed so far: {len(all_assets)}")
+                    if last_page:
+                        logger.info("[Batch %s] Retrieved fewer assets than limit, ending pagination", batch_count)
+                        break
+                        
+                    logger.info("\n[Batch %s] Completed batch", batch_count)
+                    logger.info("Total assets processed so far: %s", total_assets)
+        finally:
+            # On an early exit, such as an error in the consumer or the
+            # generator being closed, drop the queued fetches instead of
+            # waiting for every one of them before the exit surfaces
+            nested_fetcher.shutdown(cancel_futures=True)
+            prefetcher.shutdown(cancel_futures=True)
 
     logger.info("\n" + "="*60)
-    logger.info(f"[DONE] Completed processing {asset_type_name}")
-    logger.info(f"Total assets processed: {len(all_assets)}")
-    logger.info(f"Total batches processed: {batch_count}")
+    logger.info("[DONE] Completed processing %s", asset_type_name)
+    logger.info("Total assets processed: %s", total_assets)
+    logger.info("Total batches processed: %s", batch_count)
     logger.info("="*60)
+
+def process_data(asset_type_id, limit=100, nested_limit=50, max_limit=500):
+    """
+    Process asset data with improved nested field handling.
+    
+    Args:
+        asset_type_id (str): The asset type ID to process
+        limit (int): Initial maximum number of assets to return per batch
+        nested_limit (int): Limit for nested fields
+        max_limit (int): Upper bound for the batch size
+        
+    Returns:
+        list: List of processed assets
+    """
+    return list(iter_assets(asset_type_id, limit, nested_limit, max_limit))
+
+# Attribute kinds holding a single scalar value, with the key of that value
+_SCALAR_ATTRIBUTE_TYPES = (
+    ('numericAttributes', 'numericValue'),
+    ('dateAttributes', 'dateValue'),
+    ('booleanAttributes', 'booleanValue'),
+)
+
+# Relation fields with the keys of their role and of the related asset
+_RELATION_DIRECTIONS = (
+    ('outgoingRelations', 'role', 'target'),
+    ('incomingRelations', 'corole', 'source'),
+)
+
+@lru_cache(maxsize=128)
+def _base_columns(asset_type_name):
+    """
+    Get the column names of the fixed asset fields for an asset type.
+    
+    The names only depend on the asset type, so they are built once per
+    type instead of once per flattened asset.
+    
+    Args:
+        asset_type_name (str): The name of the asset type
+        
+    Returns:
+        tuple: Column names in the order used by flatten_json
+    """
+    return (
+        "UUID of Asset",
+        f"{asset_type_name} Name",
+        "Asset Type",
+        "Status",
+        f"Domain of {asset_type_name}",
+        f"Community of {asset_type_name}",
+        f"{asset_type_name} modified on",
+        f"{asset_type_name} last modified By",
+        f"{asset_type_name} created on",
+        f"{asset_type_name} created By",
+    )
+
+@lru_cache(maxsize=128)
+def _responsibility_columns(asset_type_name):
+    """
+    Get the column names of the responsibility fields for an asset type.
+    
+    Args:
+        asset_type_name (str): The name of the asset type
+        
+    Returns:
+        tuple: The user role, user name and user email column names
+    """
+    return (
+        f"User Role Against {asset_type_name}",
+        f"User Name Against {asset_type_name}",
+        f"User Email Against {asset_type_name}",
+    )
+
+@lru_cache(maxsize=4096)
+def _relation_columns(relation_direction, asset_type_name, role_type, related_type_name):
+    """
+    Get the column names for one kind of relation of an asset type.
     
-    return all_assets
+    Args:
+        relation_direction (str): 'outgoingRelations' or 'incomingRelations'
+        asset_type_name (str): The name of the asset type
+        role_type (str): The role (outgoing) or corole (incoming) of the relation
+        related_type_name (str): The asset type name of the related asset
+        
+    Returns:
+        tuple: The column for the related asset names and the column for their IDs
+    """
+    prefix = 'OGR' if relation_direction == 'outgoingRelations' else 'ICR'
+    rel_type = f"{prefix} {asset_type_name} {role_type} {related_type_name}"
+    return rel_type, f"{rel_type}_id"
+
+def _blank_to_none(text):
+    """
+    Normalize an empty or whitespace-only string to None.
+    
+    Args:
+        text (str): The string to check, or None
+        
+    Returns:
+        str: The string, or None if it is empty or only whitespace
+    """
+    return text if text and not text.isspace() else None
 
 def flatten_json(asset, asset_type_name):
     """
@@ -139,96 +321,108 @@ def flatten_json(asset, asset_type_name):
     Returns:
         dict: Flattened asset data
     """
-    flattened = {
-        # "UUID of Asset": asset.get('id'),
-        f"UUID of Asset": asset.get('fullName'),
-        f"{asset_type_name} Name": asset.get('displayName'),
-        "Asset Type": asset.get('type', {}).get('name'),
-        "Status": asset.get('status', {}).get('name'),
-        f"Domain of {asset_type_name}": asset.get('domain', {}).get('name'),
-        f"Community of {asset_type_name}": asset.get('domain', {}).get('parent', {}).get('name'),
-        f"{asset_type_name} modified on": asset.get('modifiedOn'),  # This is the only modified_on we keep
-        f"{asset_type_name} last modified By": asset.get('modifiedBy', {}).get('fullName'),
-        f"{asset_type_name} created on": asset.get('createdOn'),
-        f"{asset_type_name} created By": asset.get('createdBy', {}).get('fullName'),
-    }
-
-    # Process responsibilities
-    responsibilities = asset.get('responsibilities', [])
+    # Values are normalized as they are assigned, so no final pass over
+    # the flattened asset is needed to clear empty values. Only the text
+    # fields can be blank, the timestamps are numbers or None.
+    domain = asset.get('domain', {})
+    flattened = dict(zip(_base_columns(asset_type_name), (
+        # asset.get('id') is not exported, the full name identifies the asset
+        _blank_to_none(asset.get('fullName')),
+        _blank_to_none(asset.get('displayName')),
+        _blank_to_none(asset.get('type', {}).get('name')),
+        _blank_to_none(asset.get('status', {}).get('name')),
+        _blank_to_none(domain.get('name')),
+        _blank_to_none(domain.get('parent', {}).get('name')),
+        asset.get('modifiedOn'),  # This is the only modified_on we keep
+        _blank_to_none(asset.get('modifiedBy', {}).get('fullName')),
+        asset.get('createdOn'),
+        _blank_to_none(asset.get('createdBy', {}).get('fullName')),
+    )))
+
+    # Process responsibilities in a single pass
+    responsibilities = asset.get('responsibilities', ())
     if responsibilities:
-        user_roles = [r.get('role', {}).get('name') for r in responsibilities if r.get('role')]
-        user_names = [r.get('user', {}).get('fullName') for r in responsibilities if r.get('user')]
-        user_emails = [r.get('user', {}).get('email') for r in responsibilities if r.get('user')]
-        
-        flattened[f"User Role Against {asset_type_name}"] = ', '.join(filter(None, user_roles)) or None
-        flattened[f"User Name Against {asset_type_name}"] = ', '.join(filter(None, user_names)) or None
-        flattened[f"User Email Against {asset_type_name}"] = ', '.join(filter(None, user_emails)) or None
-
-    # Process attributes section
-    for attr_type in ['multiValueAttributes', 'stringAttributes', 'numericAttributes', 'dateAttributes', 'booleanAttributes']:
-        # Create a temporary dictionary to collect string attributes
-        string_attrs = defaultdict(list)
+        user_roles, user_names, user_emails = [], [], []
+        # Missing values are skipped here, so the lists can be joined directly
+        for responsibility in responsibilities:
+            role = responsibility.get('role')
+            if role and (role_name := role.get('name')):
+                user_roles.append(role_name)
+            user = responsibility.get('user')
+            if user:
+                if user_name := user.get('fullName'):
+                    user_names.append(user_name)
+                if user_email := user.get('email'):
+                    user_emails.append(user_email)
         
-        for attr in asset.get(attr_type, []):
-            attr_name = attr.get('type', {}).get('name')
-            if not attr_name:
-                continue
-
-            if attr_type == 'multiValueAttributes':
-                # Get string values and filter out any empty ones
-                values = [v.strip() for v in attr.get('stringValues', []) if v and v.strip()]
-                flattened[attr_name] = ', '.join(values) if values else None
-            elif attr_type == 'stringAttributes':
-                # Collect string attributes
-                value = attr.get('stringValue', '').strip()
-                if value:
-                    string_attrs[attr_name].append(value)
-            else:
-                value_key = f"{attr_type[:-10]}Value"
+        for column, values in zip(_responsibility_columns(asset_type_name),
+                                  (user_roles, user_names, user_emails)):
+            flattened[column] = _blank_to_none(', '.join(values)) if values else None
+
+    # Process attributes section, one loop per attribute kind so the
+    # kind is not re-checked for every attribute. The type of an attribute
+    # is bound once instead of looked up with an empty dict default.
+    for attr in asset.get('multiValueAttributes', ()):
+        attr_type_obj = attr.get('type')
+        attr_name = attr_type_obj.get('name') if attr_type_obj else None
+        if attr_name:
+            # Get string values and filter out any empty ones
+            values = [stripped for v in attr.get('stringValues', ()) if v and (stripped := v.strip())]
+            flattened[attr_name] = ', '.join(values) if values else None
+
+    # Collect string attributes, an attribute may have several values. The
+    # values are kept as dict keys, which drops duplicates while preserving order
+    string_attrs = defaultdict(dict)
+    for attr in asset.get('stringAttributes', ()):
+        attr_type_obj = attr.get('type')
+        attr_name = attr_type_obj.get('name') if attr_type_obj else None
+        if attr_name:
+            value = attr.get('stringValue', '').strip()
+            if value:
+                string_attrs[attr_name][value] = None
+    
+    # Process collected string attributes
+    for attr_name, values in string_attrs.items():
+        flattened[attr_name] = ', '.join(values)
+
+    for attr_type, value_key in _SCALAR_ATTRIBUTE_TYPES:
+        for attr in asset.get(attr_type, ()):
+            attr_type_obj = attr.get('type')
+            attr_name = attr_type_obj.get('name') if attr_type_obj else None
+            if attr_name:
                 value = attr.get(value_key)
-                flattened[attr_name] = str(value) if value is not None else None
-        
-        # Process collected string attributes
-        for attr_name, values in string_attrs.items():
-            # Remove duplicates while preserving order
-            unique_values = list(dict.fromkeys(values))
-            flattened[attr_name] = ', '.join(unique_values) if len(unique_values) > 0 else None
+                flattened[attr_name] = _blank_to_none(str(value)) if value is not None else None
 
     # Process relations with separate name and ID tracking
     relation_types = defaultdict(list)
     relation_ids = defaultdict(list)
     
-    for relation_direction in ['outgoingRelations', 'incomingRelations']:
-        for relation in asset.get(relation_direction, []):
-            role_or_corole = 'role' if relation_direction == 'outgoingRelations' else 'corole'
-            role_type = relation.get('type', {}).get(role_or_corole, '')
-            target_or_source = 'target' if relation_direction == 'outgoingRelations' else 'source'
-            
-            if relation_direction == 'outgoingRelations':
-                rel_type = f"OGR {asset_type_name} {role_type} {relation.get(target_or_source, {}).get('type', {}).get('name')}"
-            else:
-                rel_type = f"ICR {asset_type_name} {role_type} {relation.get(target_or_source, {}).get('type', {}).get('name')}"
-                
+    for relation_direction, role_or_corole, target_or_source in _RELATION_DIRECTIONS:
+        for relation in asset.get(relation_direction, ()):
+            relation_type = relation.get('type')
+            role_type = relation_type.get(role_or_corole, '') if relation_type else ''
             
             target_source_obj = relation.get(target_or_source, {})
+            related_type = target_source_obj.get('type')
+            # (name column, ID column) pair for this kind of relation
+            rel_columns = _relation_columns(
+                relation_direction, asset_type_name, role_type,
+                related_type.get('name') if related_type else None
+            )
+            
             display_name = target_source_obj.get('displayName', '').strip()
             asset_id = target_source_obj.get('fullName')
             
             if display_name:
-                relation_types[rel_type].append(display_name)
+                relation_types[rel_columns].append(display_name)
                 if asset_id:
-                    relation_ids[f"{rel_type}_id"].append(asset_id)
+                    relation_ids[rel_columns].append(asset_id)
 
     # Add relations and their IDs to flattened data
-    for rel_type, values in relation_types.items():
+    for rel_columns, values in relation_types.items():
+        rel_type, id_key = rel_columns
         flattened[rel_type] = ', '.join(values) if values else None
-        id_key = f"{rel_type}_id"
-        if id_key in relation_ids:
-            flattened[id_key] = ', '.join(relation_ids[id_key]) if relation_ids[id_key] else None
-
-    # Final pass to remove any remaining None or empty string values
-    for key, value in list(flattened.items()):
-        if is_empty(value):
-            flattened[key] = None
+        if rel_columns in relation_ids:
+            flattened[id_key] = _blank_to_none(', '.join(relation_ids[rel_columns]))
 
     return flattened
@@ -4,12 +4,16 @@ PostgreSQL database module
 This module provides functions for interacting with PostgreSQL database.
 """
 
+import io
 import os
+import struct
 import logging
+from itertools import islice
 from sqlalchemy import create_engine, Column, String, DateTime, MetaData, Table, inspect, text
-from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
 from dotenv import load_dotenv
+from psycopg2.extensions import encodings
+from psycopg2.extras import execute_values
 
 from collibra_exporter.utils.common import PerformanceLogger, sanitize_identifier, safe_convert_to_str
 
@@ -22,193 +26,265 @@ load_dotenv()
 # Get database URL from environment
 database_url = os.getenv('DATABASE_URL')
 
-# Create SQLAlchemy engine and session
-engine = create_engine(database_url)
-SessionLocal = sessionmaker(bind=engine)
+# Create SQLAlchemy engine. Each writer holds one connection for the whole
+# rebuild of a table, so the pool is sized for the writer threads plus
+# headroom, and a saturated pool fails after PG_POOL_TIMEOUT seconds instead
+# of blocking forever.
+engine = create_engine(
+    database_url,
+    pool_size=int(os.getenv('PG_POOL_SIZE', '8')),
+    max_overflow=16,
+    pool_timeout=int(os.getenv('PG_POOL_TIMEOUT', '30')),
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    use_native_hstore=False
+)
+# Rows are written with psycopg2's COPY and execute_values directly, which
+# other PostgreSQL drivers do not provide
+if engine.dialect.driver != 'psycopg2':
+    raise RuntimeError(
+        "DATABASE_URL must use the psycopg2 driver (postgresql+psycopg2://), "
+        f"got '{engine.dialect.name}+{engine.dialect.driver}'"
+    )
+# Tables are rebuilt at READ COMMITTED whatever the server or role default
+# is. COPY FREEZE refuses to load when the transaction already holds prior
+# snapshots, which stricter isolation levels keep for the whole transaction.
+rebuild_engine = engine.execution_options(isolation_level='READ COMMITTED')
 metadata = MetaData()
 
+# Rows sent to the database per COPY or INSERT call
+BATCH_SIZE = int(os.getenv('PG_BATCH_SIZE', '1000'))
+if BATCH_SIZE < 1:
+    # A rebuild would otherwise drop the table and commit it empty
+    raise RuntimeError(f"PG_BATCH_SIZE must be at least 1, got {BATCH_SIZE}")
+# Commit without waiting for the WAL flush. A server crash can then lose
+# the most recently committed tables, which the next export rebuilds.
+FAST_COMMIT = os.getenv('PG_FAST_COMMIT', 'false').lower() in ('1', 'true', 'yes')
+# Key of the transaction-scoped advisory lock that serializes rebuilds of
+# tables with dependent views
+VIEW_REBUILD_LOCK_ID = 0x436f6c6c  # 'Coll'
+# Row count above which data is loaded with COPY instead of INSERT
+COPY_THRESHOLD = 100
+# Rows per multi-row INSERT statement
+INSERT_PAGE_SIZE = 500
+# Signature, flags and header extension length of binary COPY data
+COPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+# End of binary COPY data marker
+COPY_TRAILER = struct.pack('!h', -1)
+# Length prefix of a field in binary COPY data
+_pack_field_length = struct.Struct('!i').pack
+
+# Schema of the database connection, cached by get_current_schema
+_current_schema = None
+
 def get_current_schema():
     """
     Get the current schema from the database connection.
     
+    The schema comes from the connection settings and does not change during
+    a run, so it is only queried once and then cached.
+    
     Returns:
         str: The current schema name or 'public' if not found
     """
-    try:
-        with engine.connect() as connection:
-            result = connection.execute(text("SELECT current_schema()"))
-            current_schema = result.scalar()
-            logger.info(f"Current database schema: {current_schema}")
-            return current_schema
-    except Exception as e:
-        logger.error(f"Error getting current schema: {e}")
-        return 'public'
+    global _current_schema
+    if _current_schema is None:
+        try:
+            with engine.connect() as connection:
+                result = connection.execute(text("SELECT current_schema()"))
+                _current_schema = result.scalar()
+                logger.info("Current database schema: %s", _current_schema)
+        except Exception as e:
+            logger.error("Error getting current schema: %s", e)
+            return 'public'
+    return _current_schema
 
-def has_dependent_views(table_name):
+def has_dependent_views(table_name, connection):
     """
-    Check if a table has any dependent views.
+    Check whether any view depends on a specific table.
+    
+    Only catalog rows are read, so unlike get_dependent_views this never
+    waits on a view that another transaction is dropping or recreating.
     
     Args:
-        table_name (str): The name of the table to check
+        table_name (str): The name of the table
+        connection: The database connection to query with
         
     Returns:
-        bool: True if the table has dependent views, False otherwise
+        bool: True if at least one view depends on the table
     """
     schema = get_current_schema()
-    try:
-        with engine.connect() as connection:
-            # First check if table exists
-            table_exists_query = """
-            SELECT EXISTS (
-                SELECT 1
-                FROM information_schema.tables 
-                WHERE table_schema = :schema 
-                AND table_name = :table_name
-            );
-            """
-            
-            table_exists = connection.execute(
-                text(table_exists_query), 
-                {'schema': schema, 'table_name': table_name}
-            ).scalar()
-            
-            if not table_exists:
-                logger.info(f"Table {schema}.{table_name} does not exist yet")
-                return False
-            
-            # Check for dependent views using view_table_usage
-            check_query = """
-            SELECT EXISTS (
-                SELECT 1
-                FROM information_schema.view_table_usage v
-                WHERE v.table_schema = :schema
-                AND v.table_name = :table_name
-            );
-            """
-            
-            result = connection.execute(text(check_query), {
-                'schema': schema,
-                'table_name': table_name
-            })
-            
-            has_views = result.scalar()
-            return has_views
-            
-    except Exception as e:
-        logger.error(f"Error checking dependent views for table {table_name}: {e}")
-        return False
+    view_query = """
+    SELECT EXISTS (
+        SELECT 1
+        FROM pg_depend d
+        JOIN pg_rewrite r ON r.oid = d.objid
+        JOIN pg_class v ON v.oid = r.ev_class
+        WHERE d.classid = 'pg_rewrite'::regclass
+        AND d.refclassid = 'pg_class'::regclass
+        AND d.refobjid <> r.ev_class
+        AND v.relkind = 'v'
+        AND d.refobjid = (
+            SELECT t.oid
+            FROM pg_class t
+            JOIN pg_namespace tn ON tn.oid = t.relnamespace
+            WHERE tn.nspname = :schema
+            AND t.relname = :table_name
+        )
+    )
+    """
+    return connection.execute(text(view_query), {
+        'schema': schema,
+        'table_name': table_name
+    }).scalar()
 
-def get_dependent_views(table_name):
+def get_dependent_views(table_name, connection):
     """
     Get views that depend on a specific table.
     
+    Existence of the table and its dependent views is checked in a single
+    catalog query; a missing table or one without dependents yields an
+    empty dict. Views in every schema are returned, since dropping the
+    table with CASCADE drops all of them.
+    
     Args:
         table_name (str): The name of the table
+        connection: The database connection to query with
         
     Returns:
-        dict: Dictionary of dependent views with their definitions and levels
+        dict: Dependent views keyed by their quoted, schema-qualified name,
+            with their definitions and levels
     """
     schema = get_current_schema()
-    logger.info(f"Finding views dependent on {schema}.{table_name}")
+    logger.info("Finding views dependent on %s.%s", schema, table_name)
     
     try:
-        with engine.connect() as connection:
-            view_query = """
-            WITH RECURSIVE view_deps AS (
-                -- First level views directly dependent on our table
-                SELECT DISTINCT 
-                    vtu.view_name as viewname,
-                    pg_get_viewdef(vtu.view_name::regclass) as definition,
-                    0 as level,
-                    ARRAY[vtu.view_name] as path
-                FROM information_schema.view_table_usage vtu
-                WHERE vtu.table_schema = :schema
-                AND vtu.table_name = :table_name
-                
-                UNION ALL
-                
-                -- Recursively get views dependent on other views
-                SELECT DISTINCT 
-                    vtu.view_name,
-                    pg_get_viewdef(vtu.view_name::regclass),
-                    vd.level + 1,
-                    vd.path || vtu.view_name
-                FROM information_schema.view_table_usage vtu
-                JOIN view_deps vd ON vtu.table_name = vd.viewname
-                WHERE vtu.table_schema = :schema
-                AND NOT vtu.view_name = ANY(vd.path)  -- Prevent cycles
+        # Dependencies are read from the system catalogs: views depend on
+        # tables and other views through their rewrite rules in pg_depend.
+        # This avoids the much slower information_schema views. A rule has
+        # one pg_depend row per referenced column, so the edges between
+        # relations are deduplicated before recursing over them. A view
+        # reachable through several paths is restored at its deepest level,
+        # after every view it depends on.
+        view_query = """
+        WITH RECURSIVE edges AS (
+            SELECT DISTINCT d.refobjid AS parent, r.ev_class AS child
+            FROM pg_depend d
+            JOIN pg_rewrite r ON r.oid = d.objid
+            JOIN pg_class v ON v.oid = r.ev_class
+            WHERE d.classid = 'pg_rewrite'::regclass
+            AND d.refclassid = 'pg_class'::regclass
+            AND d.refobjid <> r.ev_class  -- A view's rule also depends on the view
+            AND v.relkind = 'v'
+        ),
+        view_deps AS (
+            -- First level views directly dependent on our table
+            SELECT 
+                e.child AS oid,
+                0 AS level,
+                ARRAY[e.child] AS path
+            FROM edges e
+            WHERE e.parent = (
+                SELECT t.oid
+                FROM pg_class t
+                JOIN pg_namespace tn ON tn.oid = t.relnamespace
+                WHERE tn.nspname = :schema
+                AND t.relname = :table_name
             )
-            SELECT viewname, definition, level
-            FROM view_deps
-            ORDER BY level DESC;
-            """
-            
-            result = connection.execute(text(view_query), {
-                'schema': schema,
-                'table_name': table_name
-            })
-            
-            views = {row.viewname: {
-                'definition': row.definition,
-                'level': row.level
-            } for row in result}
-            
-            logger.info(f"Found {len(views)} dependent views for table {table_name}")
-            if views:
-                for viewname, view_info in views.items():
-                    logger.debug(f"Dependent view: {viewname} at level {view_info['level']}")
             
-            return views
+            UNION ALL
             
+            -- Recursively get views dependent on other views
+            SELECT 
+                e.child,
+                vd.level + 1,
+                vd.path || e.child
+            FROM view_deps vd
+            JOIN edges e ON e.parent = vd.oid
+            WHERE NOT e.child = ANY(vd.path)  -- Prevent cycles
+        )
+        SELECT
+            format('%I.%I', vn.nspname, v.relname) AS viewname,
+            pg_get_viewdef(v.oid) AS definition,
+            MAX(vd.level) AS level
+        FROM view_deps vd
+        JOIN pg_class v ON v.oid = vd.oid
+        JOIN pg_namespace vn ON vn.oid = v.relnamespace
+        GROUP BY v.oid, vn.nspname, v.relname
+        ORDER BY level DESC;
+        """
+        
+        result = connection.execute(text(view_query), {
+            'schema': schema,
+            'table_name': table_name
+        })
+        
+        views = {row.viewname: {
+            'definition': row.definition,
+            'level': row.level
+        } for row in result}
+        
+        logger.info("Found %s dependent views for table %s", len(views), table_name)
+        if views:
+            for viewname, view_info in views.items():
+                logger.debug("Dependent view: %s at level %s", viewname, view_info['level'])
+        
+        return views
+        
     except Exception as e:
-        logger.error(f"Error getting dependent views for table {table_name}: {e}")
+        logger.error("Error getting dependent views for table %s: %s", table_name, e)
         raise
 
-def restore_views(views):
+def restore_views(views, connection):
     """
     Restore views in correct dependency order.
     
+    Each view is recreated in its own schema. The views are created in the
+    caller's transaction, so they become visible together with the rebuilt
+    table.
+    
     Args:
-        views (dict): Dictionary of views to restore
+        views (dict): Dictionary of views to restore, keyed by their
+            schema-qualified names
+        connection: The database connection to create the views with
     """
-    schema = get_current_schema()
     try:
-        with engine.connect() as connection:
-            for viewname, view_info in sorted(views.items(), key=lambda x: x[1]['level']):
-                try:
-                    create_view_sql = f"CREATE OR REPLACE VIEW {schema}.{viewname} AS {view_info['definition']}"
-                    connection.execute(text(create_view_sql))
-                    connection.commit()
-                    logger.info(f"Restored dependent view: {schema}.{viewname}")
-                except Exception as e:
-                    logger.error(f"Error restoring view {schema}.{viewname}: {e}")
-                    logger.error(f"View definition: {create_view_sql}")
-                    raise
+        for viewname, view_info in sorted(views.items(), key=lambda x: x[1]['level']):
+            try:
+                create_view_sql = f"CREATE OR REPLACE VIEW {viewname} AS {view_info['definition']}"
+                connection.execute(text(create_view_sql))
+                logger.info("Restored dependent view: %s", viewname)
+            except Exception as e:
+                logger.error("Error restoring view %s: %s", viewname, e)
+                logger.error("View definition: %s", create_view_sql)
+                raise
     except Exception as e:
-        logger.error(f"Error in restore_views: {e}")
+        logger.error("Error in restore_views: %s", e)
         raise
 
-def create_table_if_not_exists(table_name, columns):
+def create_table_if_not_exists(table_name, columns, connection):
     """
     Create a table if it doesn't exist.
     
+    The table is created in the caller's transaction, so it is only visible
+    to other connections once the caller commits.
+    
     Args:
         table_name (str): The name of the table to create
-        columns (dict): Dictionary of column names and types
+        columns (dict): Dictionary of sanitized column names and types, other
+            than the asset_id primary key which is always created
+        connection: The database connection to create the table with
     """
-    db_session = SessionLocal()
     try:
         # Log the columns that will be created
-        logger.info(f"Creating table {table_name} with columns: {list(columns.keys())}")
+        logger.info("Creating table %s with columns: %s", table_name, list(columns.keys()))
         
         columns_def = []
         columns_def.append("asset_id VARCHAR PRIMARY KEY")
         
-        for col_name, _ in columns.items():
-            if col_name != 'UUID of Asset':
-                safe_col_name = sanitize_identifier(col_name)
-                logger.debug(f"Creating column: {safe_col_name} (original: {col_name})")
-                columns_def.append(f"{safe_col_name} TEXT NULL")
+        for col_name, col_type in columns.items():
+            logger.debug("Creating column: %s", col_name)
+            columns_def.append(f"{col_name} {col_type} NULL")
 
         create_table_sql = text(f"""
             CREATE TABLE IF NOT EXISTS {table_name} (
@@ -217,20 +293,109 @@ def create_table_if_not_exists(table_name, columns):
         """)
         
         # Execute table creation
-        db_session.execute(create_table_sql)
-        db_session.commit()
+        connection.execute(create_table_sql)
         
-        # Verify created columns
-        inspector = inspect(engine)
-        actual_columns = [col['name'] for col in inspector.get_columns(table_name)]
-        logger.info(f"Actual columns in table: {actual_columns}")
+        # Verify created columns on the same connection. This is a catalog
+        # round trip, so it is only done when debug logging is enabled.
+        if logger.isEnabledFor(logging.DEBUG):
+            inspector = inspect(connection)
+            actual_columns = [col['name'] for col in inspector.get_columns(table_name)]
+            logger.debug("Actual columns in table: %s", actual_columns)
         
     except Exception as e:
-        db_session.rollback()
-        logger.error(f"Error creating table {table_name}: {e}")
+        logger.error("Error creating table %s: %s", table_name, e)
         raise
+
+def copy_rows(connection, table_name, columns, rows):
+    """
+    Bulk load rows into a table using PostgreSQL COPY.
+    
+    Rows are written to an in-memory buffer in PostgreSQL's binary COPY
+    format and streamed to the server in a single COPY, which avoids
+    per-row statement overhead. All columns are TEXT, so each value is
+    simply its encoded bytes with a length prefix and the server does not
+    have to parse CSV quoting.
+    
+    The table must have been created in the current transaction: rows are
+    loaded already frozen, so the server does not have to rewrite the new
+    pages later to set hint bits and freeze them.
+    
+    Args:
+        connection: The database connection whose transaction is used
+        table_name (str): The name of the target table
+        columns (list): Column names, in the order values are written
+        rows (list): List of row tuples, in column order
+    """
+    cursor = connection.connection.cursor()
+    encoding = encodings[cursor.connection.encoding]
+    
+    buffer = io.BytesIO()
+    write = buffer.write
+    write(COPY_HEADER)
+    field_count = struct.pack('!h', len(columns))
+    null_field = _pack_field_length(-1)
+    for row in rows:
+        write(field_count)
+        for value in row:
+            if value is None:
+                write(null_field)
+            else:
+                data = value.encode(encoding)
+                write(_pack_field_length(len(data)))
+                write(data)
+    write(COPY_TRAILER)
+    buffer.seek(0)
+    
+    copy_sql = f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT binary, FREEZE)"
+    try:
+        cursor.copy_expert(copy_sql, buffer)
     finally:
-        db_session.close()
+        cursor.close()
+
+def replace_unencodable(rows, encoding):
+    """
+    Replace characters that the connection encoding cannot represent.
+    
+    Only used for a batch that failed to encode: characters outside a
+    non-UTF-8 client encoding, or unpaired surrogates, which no encoding
+    accepts. Such characters are replaced with '?' so that a single value
+    does not fail the whole load. ASCII values are passed through as is.
+    
+    Args:
+        rows (list): List of row tuples of strings or None
+        encoding (str): Python codec name of the connection encoding
+        
+    Returns:
+        list: The rows with unencodable characters replaced
+    """
+    return [
+        tuple(
+            value if value is None or value.isascii()
+            else value.encode(encoding, 'replace').decode(encoding)
+            for value in row
+        )
+        for row in rows
+    ]
+
+def insert_rows(connection, table_name, columns, rows):
+    """
+    Insert rows into a table using multi-row INSERT statements.
+    
+    psycopg2's execute_values packs up to INSERT_PAGE_SIZE rows into each
+    INSERT ... VALUES statement instead of sending one statement per row.
+    
+    Args:
+        connection: The database connection whose transaction is used
+        table_name (str): The name of the target table
+        columns (list): Column names, in the order values are given
+        rows (list): List of row tuples, in column order
+    """
+    insert_sql = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES %s"
+    cursor = connection.connection.cursor()
+    try:
+        execute_values(cursor, insert_sql, rows, page_size=INSERT_PAGE_SIZE)
+    finally:
+        cursor.close()
 
 def save_to_postgres(asset_type_name, data):
     """
@@ -241,42 +406,25 @@ def save_to_postgres(asset_type_name, data):
         data (list): List of flattened asset data dictionaries
     """
     if not data:
-        logger.warning(f"No data to save for {asset_type_name}")
+        logger.warning("No data to save for %s", asset_type_name)
         return
 
     with PerformanceLogger(f"save_to_postgres_{asset_type_name}"):
         safe_asset_type_name = sanitize_identifier(asset_type_name or 'unknown_asset_type')
         table_name = f"collibra_{safe_asset_type_name}"
         
-        db_session = SessionLocal()
-        dependent_views = None
-        
         try:
-            # First check if this table has any dependent views
-            if has_dependent_views(table_name):
-                logger.info(f"Table {table_name} has dependent views, saving them...")
-                dependent_views = get_dependent_views(table_name)
-                if dependent_views:
-                    logger.info(f"Found {len(dependent_views)} dependent views to preserve")
-            else:
-                logger.info(f"No dependent views found for table {table_name}")
+            # Get columns from the flattened data, in first-seen order. Most rows
+            # share the first row's columns, so only new keys are added.
+            base_columns = list(data[0].keys())
+            seen_columns = set(base_columns)
+            for row in islice(data, 1, None):
+                extra_columns = row.keys() - seen_columns
+                if extra_columns:
+                    base_columns.extend(key for key in row if key in extra_columns)
+                    seen_columns.update(extra_columns)
             
-            # Get columns from the flattened data
-            base_columns = set()
-            for row in data:
-                base_columns.update(row.keys())
-            
-            logger.info(f"Total unique columns found: {len(base_columns)}")
-            columns_dict = {col: 'TEXT' for col in base_columns}
-            
-            # Drop the table (CASCADE only if we have dependent views)
-            drop_stmt = text(f"DROP TABLE IF EXISTS {table_name} CASCADE")
-            db_session.execute(drop_stmt)
-            db_session.commit()
-            logger.info(f"Dropped table: {table_name}")
-            
-            # Create fresh table with all columns
-            create_table_if_not_exists(table_name, columns_dict)
+            logger.info("Total unique columns found: %s", len(base_columns))
             
             # Prepare the data with consistent UUID handling
             sanitized_columns = {}
@@ -286,52 +434,84 @@ def save_to_postgres(asset_type_name, data):
                     safe_name = 'asset_id'
                 sanitized_columns[key] = safe_name
 
-            # Prepare the insert statement
             columns_list = list(sanitized_columns.values())
-            placeholders = ', '.join([f':{col}' for col in columns_list])
+            # Definitions of the columns besides the asset_id primary key,
+            # reusing the names sanitized above
+            columns_dict = {
+                safe_name: 'TEXT' for key, safe_name in sanitized_columns.items()
+                if key != 'UUID of Asset'
+            }
             
-            insert_stmt = text(f"""
-                INSERT INTO {table_name} ({', '.join(columns_list)})
-                VALUES ({placeholders})
-            """)
+            # Prepare the data lazily as tuples in column order, so only one
+            # batch of converted rows exists at a time
+            prepared_rows = (
+                tuple(safe_convert_to_str(row.get(key)) for key in base_columns)
+                for row in data
+                if row.get('UUID of Asset')
+            )
+            write_rows = copy_rows if len(data) > COPY_THRESHOLD else insert_rows
+            saved_count = 0
             
-            # Prepare the data
-            prepared_data = []
-            for row in data:
-                if not row.get('UUID of Asset'):
-                    continue
-                    
-                prepared_row = {}
-                for original_key in base_columns:
-                    if original_key not in sanitized_columns:
-                        logger.warning(f"Missing column mapping for: {original_key}")
-                        continue
-                        
-                    column_name = sanitized_columns[original_key]
-                    value = row.get(original_key)
-                    prepared_row[column_name] = safe_convert_to_str(value)
+            # Rebuild the table and its dependent views in a single transaction
+            # on one connection, so other sessions never see the table without
+            # its views; the connection goes back to the pool when the block exits
+            with rebuild_engine.begin() as connection:
+                if FAST_COMMIT:
+                    connection.execute(text("SET LOCAL synchronous_commit = off"))
                 
-                prepared_data.append(prepared_row)
-            
-            if prepared_data:
-                db_session.execute(insert_stmt, prepared_data)
-                db_session.commit()
-                logger.info(f"Successfully saved {len(prepared_data)} records to {table_name}")
+                # First check if this table has any dependent views. A view can
+                # depend on several exported tables, and rebuilding two of them
+                # at once would drop and restore that view in both transactions,
+                # each waiting on the other's locks. Rebuilds with views take
+                # turns, and their views are only read once it is their turn.
+                dependent_views = {}
+                if has_dependent_views(table_name, connection):
+                    connection.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"),
+                                       {'lock_id': VIEW_REBUILD_LOCK_ID})
+                    dependent_views = get_dependent_views(table_name, connection)
+                if dependent_views:
+                    logger.info("Found %s dependent views to preserve", len(dependent_views))
+                else:
+                    logger.info("No dependent views found for table %s", table_name)
+                
+                # Drop the table (CASCADE only if we have dependent views)
+                drop_stmt = text(f"DROP TABLE IF EXISTS {table_name} CASCADE")
+                connection.execute(drop_stmt)
+                logger.info("Dropped table: %s", table_name)
+                
+                # Create fresh table with all columns
+                create_table_if_not_exists(table_name, columns_dict, connection)
+                
+                encoding = encodings[connection.connection.dbapi_connection.encoding]
+                
+                # Send the rows in batches to bound the size of each COPY buffer
+                # or INSERT statement; everything still commits together
+                while batch := list(islice(prepared_rows, BATCH_SIZE)):
+                    try:
+                        write_rows(connection, table_name, columns_list, batch)
+                    except UnicodeEncodeError as e:
+                        # Values are encoded before anything is sent: COPY builds
+                        # its whole buffer first, and INSERT batches fit in one
+                        # statement. So the batch can be sent again with the
+                        # offending characters replaced.
+                        logger.warning("Replacing characters the %s connection cannot encode in %s: %s",
+                                       encoding, table_name, e)
+                        write_rows(connection, table_name, columns_list, replace_unencodable(batch, encoding))
+                    saved_count += len(batch)
+                
+                # After data insertion, restore the dropped views
+                if dependent_views:
+                    logger.info("Restoring dependent views...")
+                    try:
+                        restore_views(dependent_views, connection)
+                        logger.info("Dependent views restored successfully")
+                    except Exception as e:
+                        logger.error("Failed to restore dependent views: %s", e)
+                        raise
             
-            # After data insertion, restore views only if we saved any
-            if dependent_views:
-                logger.info("Restoring dependent views...")
-                try:
-                    restore_views(dependent_views)
-                    logger.info("Dependent views restored successfully")
-                except Exception as e:
-                    logger.error(f"Failed to restore dependent views: {e}")
-                    raise
+            if saved_count:
+                logger.info("Successfully saved %s records to %s", saved_count, table_name)
             
         except Exception as e:
-            db_session.rollback()
-            logger.error(f"Error saving data for {asset_type_name}: {e}")
+            logger.error("Error saving data for %s: %s", asset_type_name, e)
             raise
-        
-        finally:
-            db_session.close()
@@ -5,45 +5,85 @@ This is the main entry point for the Collibra Bulk Exporter application.
 It processes asset types from Collibra and exports them to PostgreSQL.
 """
 
+import os
 import json
 import logging
+import threading
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from collibra_exporter.utils.common import setup_logging, PerformanceLogger
 from collibra_exporter.api.asset_types import get_asset_type_name
-from collibra_exporter.api.processor import process_data, flatten_json
+from collibra_exporter.api.client import MAX_WORKERS
+from collibra_exporter.api.processor import iter_assets, flatten_json
 from collibra_exporter.db.postgres import save_to_postgres
 
-def process_asset_type(asset_type_id):
+def fetch_asset_type(asset_type_id, slots=None):
     """
-    Process a single asset type from Collibra and save it to PostgreSQL.
+    Fetch all assets of an asset type from Collibra and flatten them.
     
     Args:
-        asset_type_id (str): The ID of the asset type to process
+        asset_type_id (str): The ID of the asset type to fetch
+        slots (threading.BoundedSemaphore): Optional limit on the asset types
+            held in memory. A slot is taken before fetching and released here
+            only if the fetch fails; otherwise the caller releases it once the
+            rows are saved.
         
     Returns:
-        float: The time taken to process the asset type in seconds
+        tuple: The asset type name, the list of flattened assets and the
+            time processing started
     """
-    start_time = time.time()
-    asset_type_name = get_asset_type_name(asset_type_id)
-    logging.info(f"Processing asset type: {asset_type_name}")
+    if slots is not None:
+        slots.acquire()
+    try:
+        start_time = time.time()
+        asset_type_name = get_asset_type_name(asset_type_id)
+        logging.info("Processing asset type: %s", asset_type_name)
 
-    all_assets = process_data(asset_type_id)
+        # Flatten assets as they arrive so the raw responses are never all held at once
+        flattened_assets = [flatten_json(asset, asset_type_name) for asset in iter_assets(asset_type_id)]
+    except BaseException:
+        if slots is not None:
+            slots.release()
+        raise
+    return asset_type_name, flattened_assets, start_time
 
-    if all_assets:
-        flattened_assets = [flatten_json(asset, asset_type_name) for asset in all_assets]
+def save_asset_type(asset_type_name, flattened_assets, start_time):
+    """
+    Save the flattened assets of an asset type to PostgreSQL.
+    
+    Args:
+        asset_type_name (str): The name of the asset type
+        flattened_assets (list): List of flattened asset data dictionaries
+        start_time (float): The time processing of the asset type started
+        
+    Returns:
+        float: The time taken to process the asset type in seconds
+    """
+    if flattened_assets:
         save_to_postgres(asset_type_name, flattened_assets)
 
         end_time = time.time()
         elapsed_time = end_time - start_time
 
-        logging.info(f"Time taken to process {asset_type_name}: {elapsed_time:.2f} seconds")
+        logging.info("Time taken to process %s: %.2f seconds", asset_type_name, elapsed_time)
         return elapsed_time
     else:
-        logging.critical(f"No data to save for {asset_type_name}")
+        logging.critical("No data to save for %s", asset_type_name)
         return 0
 
+def process_asset_type(asset_type_id):
+    """
+    Process a single asset type from Collibra and save it to PostgreSQL.
+    
+    Args:
+        asset_type_id (str): The ID of the asset type to process
+        
+    Returns:
+        float: The time taken to process the asset type in seconds
+    """
+    return save_asset_type(*fetch_asset_type(asset_type_id))
+
 def main():
     """
     Main execution function with improved error handling and logging.
@@ -51,8 +91,9 @@ def main():
     This function:
     1. Sets up logging
     2. Loads asset type IDs from configuration
-    3. Processes each asset type in parallel using ThreadPoolExecutor
-    4. Logs summary statistics
+    3. Fetches each asset type in parallel using ThreadPoolExecutor
+    4. Saves fetched asset types using a separate pool of writer threads
+    5. Logs summary statistics
     """
     # Initialize logging
     setup_logging()
@@ -71,41 +112,68 @@ def main():
                     data = json.load(file)
                 
                 asset_type_ids = data['ids']
-                logging.info(f"Processing {len(asset_type_ids)} asset types")
+                logging.info("Processing %s asset types", len(asset_type_ids))
             except (FileNotFoundError, json.JSONDecodeError, KeyError) as e:
-                logging.critical(f"Error loading asset type IDs: {e}")
+                logging.critical("Error loading asset type IDs: %s", e)
                 return
             
-            # Process asset types in parallel
-            with ThreadPoolExecutor(max_workers=5) as executor:
+            # Fetch asset types in parallel and hand each finished one to a
+            # smaller pool of writers, so database writes overlap with fetching
+            max_workers = MAX_WORKERS
+            writer_workers = int(os.getenv('WRITER_WORKERS', '2'))
+            # Each asset type holds a slot from the start of its fetch until
+            # its rows are saved. When writes fall behind, fetchers wait for a
+            # slot instead of piling flattened rows up in the writer queue.
+            slots = threading.BoundedSemaphore(max_workers + writer_workers)
+            with ThreadPoolExecutor(max_workers=writer_workers) as writer, \
+                    ThreadPoolExecutor(max_workers=max_workers) as executor:
                 future_to_asset = {
-                    executor.submit(process_asset_type, asset_type_id): asset_type_id 
+                    executor.submit(fetch_asset_type, asset_type_id, slots): asset_type_id 
                     for asset_type_id in asset_type_ids
                 }
+                save_future_to_asset = {}
                 
                 for future in as_completed(future_to_asset):
-                    asset_type_id = future_to_asset[future]
+                    # Forget the fetch future once its rows are handed to a
+                    # writer, so they can be freed as soon as they are saved
+                    asset_type_id = future_to_asset.pop(future)
+                    try:
+                        save_future = writer.submit(save_asset_type, *future.result())
+                    except Exception as e:
+                        # A failed fetch has already released its slot
+                        if future.exception() is None:
+                            slots.release()
+                        error_count += 1
+                        logging.error("Error processing asset type %s: %s", asset_type_id, e)
+                        continue
+                    finally:
+                        del future
+                    save_future.add_done_callback(lambda _: slots.release())
+                    save_future_to_asset[save_future] = asset_type_id
+                
+                for future in as_completed(save_future_to_asset):
+                    asset_type_id = save_future_to_asset[future]
                     try:
                         elapsed_time = future.result()
                         if elapsed_time:
                             success_count += 1
                     except Exception as e:
                         error_count += 1
-                        logging.error(f"Error processing asset type {asset_type_id}: {str(e)}")
+                        logging.error("Error processing asset type %s: %s", asset_type_id, e)
             
             # Log summary statistics
             total_time = time.time() - total_start_time
-            logging.info(f"""
+            logging.info("""
 Export Summary:
 --------------
-Total asset types: {len(asset_type_ids)}
-Successful: {success_count}
-Failed: {error_count}
-Total time: {total_time:.2f} seconds
-            """)
+Total asset types: %s
+Successful: %s
+Failed: %s
+Total time: %.2f seconds
+            """, len(asset_type_ids), success_count, error_count, total_time)
             
         except Exception as e:
-            logging.critical(f"Critical error in main execution: {str(e)}")
+            logging.critical("Critical error in main execution: %s", e)
             raise
 
 if __name__ == "__main__":
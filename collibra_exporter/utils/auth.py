@@ -7,6 +7,8 @@ This module handles OAuth authentication with Collibra.
 import os
 import time
 import logging
+import threading
+import orjson
 import requests
 from dotenv import load_dotenv
 
@@ -21,6 +23,8 @@ class OAuthTokenManager:
     Manages OAuth token lifecycle for Collibra API authentication.
     
     This class handles token acquisition, caching, and automatic renewal.
+    It is shared by all worker threads; renewals are serialized so that a
+    token that expires or is rejected is only replaced once.
     """
     
     def __init__(self):
@@ -30,6 +34,11 @@ class OAuthTokenManager:
         # Add buffer time (30 seconds) to refresh before actual expiration
         self._refresh_buffer = 30
         self._session = requests.Session()
+        self._lock = threading.Lock()
+
+    def _needs_refresh(self):
+        """Check whether the cached token is missing or about to expire."""
+        return not self._token or time.monotonic() >= (self._expiration_time - self._refresh_buffer)
 
     def get_valid_token(self):
         """
@@ -38,14 +47,32 @@ class OAuthTokenManager:
         Returns:
             str: A valid OAuth token
         """
-        current_time = time.time()
-        
         # Check if token is expired or will expire soon
-        if not self._token or current_time >= (self._expiration_time - self._refresh_buffer):
-            self._fetch_new_token()
+        if self._needs_refresh():
+            with self._lock:
+                # Another thread may have renewed it while we waited
+                if self._needs_refresh():
+                    self._fetch_new_token()
             
         return self._token
 
+    def refresh_token(self, rejected_token=None):
+        """
+        Discard the cached token and fetch a new one.
+        
+        Args:
+            rejected_token (str): The token the API rejected. If another
+                thread has already replaced it, that newer token is returned
+                instead of fetching again.
+        
+        Returns:
+            str: The new OAuth token
+        """
+        with self._lock:
+            if rejected_token is not None and self._token and self._token != rejected_token:
+                return self._token
+            return self._fetch_new_token()
+
     def _fetch_new_token(self):
         """
         Fetch a new OAuth token from the server.
@@ -68,17 +95,17 @@ class OAuthTokenManager:
         try:
             response = self._session.post(url=url, data=payload, headers=headers)
             response.raise_for_status()
-            token_data = response.json()
+            token_data = orjson.loads(response.content)
             
             self._token = token_data["access_token"]
             # Set expiration time based on server response
-            self._expiration_time = time.time() + token_data["expires_in"]
+            self._expiration_time = time.monotonic() + token_data["expires_in"]
             
             logger.info("Successfully obtained new OAuth token")
             return self._token
             
         except requests.RequestException as e:
-            logger.error(f"Error obtaining OAuth token: {e}")
+            logger.error("Error obtaining OAuth token: %s", e)
             raise
 
 # Create a singleton instance
@@ -101,3 +128,40 @@ def get_auth_header():
         dict: Authorization header with Bearer token
     """
     return {'Authorization': f'Bearer {get_oauth_token()}'}
+
+def refresh_oauth_token(rejected_token=None):
+    """
+    Discard the cached OAuth token and fetch a new one.
+    
+    Used when the API rejects the current token before its expected expiry.
+    
+    Args:
+        rejected_token (str): The token the API rejected, so that concurrent
+            401s only trigger a single refresh
+    
+    Returns:
+        str: The new OAuth token
+    """
+    return token_manager.refresh_token(rejected_token)
+
+class CollibraAuth(requests.auth.AuthBase):
+    """
+    Requests authentication handler for the Collibra API.
+    
+    Attached to a session, it adds the bearer token to every request it
+    sends. The token is cached by the token manager and only fetched again
+    when it is about to expire or has been refreshed after a 401.
+    """
+    
+    def __call__(self, request):
+        """
+        Add the authorization header to an outgoing request.
+        
+        Args:
+            request (requests.PreparedRequest): The request to authenticate
+            
+        Returns:
+            requests.PreparedRequest: The request with the header set
+        """
+        request.headers.update(get_auth_header())
+        return request
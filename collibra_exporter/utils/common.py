@@ -5,11 +5,40 @@ This module provides common utility functions used across the application.
 """
 
 import os
+import re
 import sys
 import time
-import codecs
+import queue
+import atexit
 import logging
-from functools import wraps
+from functools import lru_cache, wraps
+from logging.handlers import QueueHandler, QueueListener
+
+# PostgreSQL reserved keywords (partial list)
+RESERVED_KEYWORDS = frozenset({
+    'all', 'analyse', 'analyze', 'and', 'any', 'array', 'as', 'asc',
+    'asymmetric', 'authorization', 'between', 'binary', 'both', 'case',
+    'cast', 'check', 'collate', 'column', 'constraint', 'create', 'cross',
+    'current_date', 'current_role', 'current_time', 'current_timestamp',
+    'current_user', 'default', 'deferrable', 'desc', 'distinct', 'do',
+    'else', 'end', 'except', 'false', 'for', 'foreign', 'freeze', 'from',
+    'full', 'grant', 'group', 'having', 'ilike', 'in', 'initially', 'inner',
+    'intersect', 'into', 'is', 'isnull', 'join', 'leading', 'left', 'like',
+    'limit', 'localtime', 'localtimestamp', 'natural', 'not', 'notnull',
+    'null', 'off', 'offset', 'on', 'only', 'or', 'order', 'outer', 'over',
+    'overlaps', 'placing', 'primary', 'references', 'returning', 'right',
+    'select', 'session_user', 'similar', 'some', 'symmetric', 'table',
+    'then', 'to', 'trailing', 'true', 'union', 'unique', 'user', 'using',
+    'variadic', 'verbose', 'when', 'where', 'with'
+})
+
+# Precompiled patterns used by sanitize_identifier
+_INVALID_IDENTIFIER_CHARS = re.compile(r'\W')
+_REPEATED_UNDERSCORES = re.compile(r'__+')
+# Translation table replacing invalid ASCII identifier characters with underscores
+_ASCII_IDENTIFIER_TABLE = str.maketrans({
+    c: '_' for c in map(chr, range(128)) if not (c.isalnum() or c == '_')
+})
 
 def setup_logging():
     """
@@ -19,36 +48,57 @@ def setup_logging():
     - Console handler (stdout)
     - Timestamped file handler
     - Latest log file handler
-    - Debug log file handler
+    - Debug log file handler, only when the DEBUG_LOG environment variable
+      is set to true; debug records are only emitted in that case
+    
+    Records are handed to the handlers through a queue so that console and
+    file I/O happens on a background listener thread instead of the worker
+    threads doing the export.
     """
     log_format = '%(asctime)s - %(levelname)s - %(message)s'
     date_format = '%Y-%m-%d %H:%M:%S'
+    formatter = logging.Formatter(log_format, date_format)
     
     # Create logs directory if it doesn't exist
     os.makedirs('logs', exist_ok=True)
     
-    logging.basicConfig(
-        level=logging.INFO,
-        format=log_format,
-        datefmt=date_format,
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler(f'logs/app_{time.strftime("%Y%m%d_%H%M%S")}.log', encoding='utf-8'),
-            logging.FileHandler('logs/latest.log', encoding='utf-8', mode='w')
-        ]
-    )
-    
-    # Add debug file handler
-    debug_handler = logging.FileHandler('logs/debug.log', encoding='utf-8')
-    debug_handler.setLevel(logging.DEBUG)
-    debug_handler.setFormatter(logging.Formatter(log_format, date_format))
-    logging.getLogger().addHandler(debug_handler)
+    handlers = [
+        logging.StreamHandler(sys.stdout),
+        logging.FileHandler(f'logs/app_{time.strftime("%Y%m%d_%H%M%S")}.log', encoding='utf-8'),
+        logging.FileHandler('logs/latest.log', encoding='utf-8', mode='w', delay=True)
+    ]
+    for handler in handlers:
+        handler.setLevel(logging.INFO)
+    
+    # Add debug file handler. It would otherwise write every record a second
+    # time, so it is opt-in.
+    debug_enabled = os.getenv('DEBUG_LOG', 'false').lower() in ('1', 'true', 'yes')
+    if debug_enabled:
+        debug_handler = logging.FileHandler('logs/debug.log', encoding='utf-8', delay=True)
+        debug_handler.setLevel(logging.DEBUG)
+        handlers.append(debug_handler)
+    
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.DEBUG if debug_enabled else logging.INFO)
+    root_logger.addHandler(QueueHandler(log_queue))
     
     # Set console encoding to UTF-8 for Windows
-    if sys.platform == 'win32':
-        sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, errors='replace')
-        sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, errors='replace')
-        os.system('chcp 65001')
+    if sys.platform == 'win32' and not (sys.stdout.encoding or '').lower().startswith('utf'):
+        # Re-encode the existing streams in place rather than wrapping them
+        sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+        sys.stderr.reconfigure(encoding='utf-8', errors='replace')
+        # Switch the console code page directly instead of spawning `chcp`
+        import ctypes
+        ctypes.windll.kernel32.SetConsoleOutputCP(65001)
+        ctypes.windll.kernel32.SetConsoleCP(65001)
         logging.debug("Windows console encoding set to UTF-8")
 
 class PerformanceLogger:
@@ -72,16 +122,16 @@ class PerformanceLogger:
     def __enter__(self):
         """Start the timer when entering the context."""
         self.start_time = time.time()
-        logging.debug(f"Starting {self.operation_name}")
+        logging.debug("Starting %s", self.operation_name)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Log the duration when exiting the context."""
         duration = time.time() - self.start_time
         if exc_type:
-            logging.error(f"{self.operation_name} failed after {duration:.2f} seconds")
+            logging.error("%s failed after %.2f seconds", self.operation_name, duration)
         else:
-            logging.debug(f"{self.operation_name} completed in {duration:.2f} seconds")
+            logging.debug("%s completed in %.2f seconds", self.operation_name, duration)
 
 def performance_logger(func):
     """
@@ -100,50 +150,35 @@ def performance_logger(func):
             return func(*args, **kwargs)
     return wrapper
 
-def is_empty(value):
-    """
-    Check if a value is considered empty.
-    
-    Args:
-        value: The value to check
-        
-    Returns:
-        bool: True if the value is empty, False otherwise
-    """
-    if value is None:
-        return True
-    if isinstance(value, str):
-        return value.strip() == ''
-    if isinstance(value, (list, dict, tuple, set)):
-        return len(value) == 0
-    return False
-
 def safe_convert_to_str(value):
     """
-    Handle special characters and encodings when converting to string.
+    Convert a value to a string for storage in a TEXT column.
+    
+    Strings are returned unchanged, including non-ASCII characters; the
+    database driver encodes them once for the connection when they are sent.
     
     Args:
         value: The value to convert
         
     Returns:
-        str or None: The converted string or None if conversion fails
+        str or None: The converted string or None if the value is None
     """
     if value is None:
         return None
-        
-    try:
-        if isinstance(value, (list, tuple)):
-            return ', '.join(str(v).encode('ascii', 'ignore').decode('ascii') 
-                            for v in value if v is not None)
-        return str(value).encode('ascii', 'ignore').decode('ascii')
-    except Exception as e:
-        logging.error(f"Error converting value to string: {e}")
-        return None
+    if type(value) is str:
+        return value
+    if isinstance(value, (list, tuple)):
+        return ', '.join(str(v) for v in value if v is not None)
+    return str(value)
 
+@lru_cache(maxsize=4096)
 def sanitize_identifier(name):
     """
     Sanitize table/column names for database compatibility by automatically fixing issues.
     
+    Results are cached since the same column names are sanitized for every
+    asset type and every save.
+    
     Args:
         name (str): The name to sanitize
         
@@ -153,50 +188,27 @@ def sanitize_identifier(name):
     if name is None:
         return 'unnamed'
     
-    # PostgreSQL reserved keywords (partial list)
-    RESERVED_KEYWORDS = {
-        'all', 'analyse', 'analyze', 'and', 'any', 'array', 'as', 'asc',
-        'asymmetric', 'authorization', 'between', 'binary', 'both', 'case',
-        'cast', 'check', 'collate', 'column', 'constraint', 'create', 'cross',
-        'current_date', 'current_role', 'current_time', 'current_timestamp',
-        'current_user', 'default', 'deferrable', 'desc', 'distinct', 'do',
-        'else', 'end', 'except', 'false', 'for', 'foreign', 'freeze', 'from',
-        'full', 'grant', 'group', 'having', 'ilike', 'in', 'initially', 'inner',
-        'intersect', 'into', 'is', 'isnull', 'join', 'leading', 'left', 'like',
-        'limit', 'localtime', 'localtimestamp', 'natural', 'not', 'notnull',
-        'null', 'off', 'offset', 'on', 'only', 'or', 'order', 'outer', 'over',
-        'overlaps', 'placing', 'primary', 'references', 'returning', 'right',
-        'select', 'session_user', 'similar', 'some', 'symmetric', 'table',
-        'then', 'to', 'trailing', 'true', 'union', 'unique', 'user', 'using',
-        'variadic', 'verbose', 'when', 'where', 'with'
-    }
-    
-    original_name = name
-    sanitized = name.lower()
-    
     # Replace any invalid characters with underscores
-    sanitized = ''.join(c if c.isalnum() or c == '_' else '_' for c in sanitized)
+    sanitized = name.lower()
+    if sanitized.isascii():
+        sanitized = sanitized.translate(_ASCII_IDENTIFIER_TABLE)
+    else:
+        sanitized = _INVALID_IDENTIFIER_CHARS.sub('_', sanitized)
     
     # Ensure it starts with a letter or underscore
-    while sanitized and sanitized[0].isdigit():
+    if sanitized[:1].isdigit():
         sanitized = f"_{sanitized}"
     
     # Handle reserved keywords by adding suffix
     if sanitized in RESERVED_KEYWORDS:
         sanitized = f"{sanitized}_col"
     
-    # Remove consecutive underscores and trim length
-    while '__' in sanitized:
-        sanitized = sanitized.replace('__', '_')
+    # Remove consecutive underscores
+    sanitized = _REPEATED_UNDERSCORES.sub('_', sanitized)
     
     # Trim to PostgreSQL's maximum identifier length (63 characters)
-    sanitized = sanitized[:63]
-    
-    # Remove trailing underscores
-    sanitized = sanitized.rstrip('_')
+    # and remove trailing underscores
+    sanitized = sanitized[:63].rstrip('_')
     
     # Final fallback if we ended up with nothing valid
-    if not sanitized:
-        sanitized = 'unnamed'
-    
-    return sanitized
+    return sanitized or 'unnamed'